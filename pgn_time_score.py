@@ -1,41 +1,123 @@
 #!/usr/bin/env python3
 import argparse
 import math
-import re
+from functools import lru_cache
+from itertools import accumulate
 import chess.pgn
 
+_CLOCK_TAG = "[%clk"
+_DETAIL_HEADER = (
+    f"{'No.':>3}  {'Move':<8}  {'Time(s)':>7}  {'CumTime':>10}  "
+    f"{'Remain':>10}  {'AvgSoFar(s)':>12}  {'Delta(%)':>8}  {'Remark':>10}"
+)
+_DETAIL_SEP = "-" * len(_DETAIL_HEADER)
+_FAST_CELL = "fast".rjust(10)
+_SLOW_CELL = "slow".rjust(10)
+_OPTIMAL_CELL = "optimal".rjust(10)
+_TWO_DIGITS = [f"{i:02d}" for i in range(100)]
+
 
 def format_mmss(seconds):
-    minutes = int(seconds // 60)
-    secs = int(seconds % 60)
-    return f"{minutes:02d}:{secs:02d}"
+    minutes, secs = divmod(int(seconds // 1), 60)
+    if 0 <= minutes < 100:
+        return f"{_TWO_DIGITS[minutes]}:{_TWO_DIGITS[secs]}"
+    return f"{minutes:02d}:{_TWO_DIGITS[secs]}"
 
 
+@lru_cache(maxsize=4096)
 def parse_time_str(time_str):
     """
     Convert a clock string (e.g. "0:29:59.9") into seconds (float).
     Supports formats like H:MM:SS.s or MM:SS.s.
     """
-    parts = time_str.split(":")
-    if len(parts) == 3:
-        hours = int(parts[0])
-        minutes = int(parts[1])
-        seconds = float(parts[2])
-        return hours * 3600 + minutes * 60 + seconds
-    elif len(parts) == 2:
-        minutes = int(parts[0])
-        seconds = float(parts[1])
-        return minutes * 60 + seconds
-    else:
+    first = time_str.find(":")
+    if first < 0:
         return float(time_str)
+    second = time_str.find(":", first + 1)
+    if second < 0:
+        return int(time_str[:first]) * 60 + float(time_str[first + 1 :])
+    return (
+        int(time_str[:first]) * 3600
+        + int(time_str[first + 1 : second]) * 60
+        + float(time_str[second + 1 :])
+    )
+
+
+def parse_clock_comment(comment):
+    """
+    Extract the remaining clock time (in seconds) from a move comment
+    containing a "[%clk H:MM:SS.s]" tag. Returns None if no usable tag is
+    present.
+    """
+    start = comment.find(_CLOCK_TAG)
+    while start >= 0:
+        start += len(_CLOCK_TAG)
+        # The tag name must be followed by whitespace ("[%clkx" is another tag).
+        if comment[start : start + 1].isspace():
+            end = comment.find("]", start)
+            if end < 0:
+                return None
+            time_str = comment[start:end].strip()
+            if time_str:
+                return parse_time_str(time_str)
+        start = comment.find(_CLOCK_TAG, start)
+    return None
+
+
+class ClockVisitor(chess.pgn.BaseVisitor):
+    """
+    Streaming PGN visitor that records the game headers and, for each mainline
+    move, a (side, san, clock_seconds) tuple, where side is the chess.Color
+    (True for White) that played it. Side variations are skipped by the
+    reader and no game tree is built.
+    """
+
+    def begin_game(self):
+        self.headers = chess.pgn.Headers()
+        self.moves = []
+        self.errors = []
+
+    def begin_headers(self):
+        return self.headers
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def begin_variation(self):
+        # Side variations carry no clock data for the game actually played.
+        return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        self.moves.append((board.turn, board.san(move), None))
+
+    def visit_comment(self, comment):
+        # Comments before the first move belong to the game, not a move.
+        if not self.moves:
+            return
+        side, san_move, clock_seconds = self.moves[-1]
+        if clock_seconds is None:
+            self.moves[-1] = (side, san_move, parse_clock_comment(comment))
+
+    def visit_result(self, result):
+        if self.headers.get("Result", "*") == "*":
+            self.headers["Result"] = result
+
+    def result(self):
+        return self
+
+    def handle_error(self, error):
+        chess.pgn.LOGGER.error("%s while parsing PGN", error)
+        self.errors.append(error)
 
 
 def process_game(game):
     """
-    Process the chess.pgn.Game object to compute move times.
+    Process the game collected by ClockVisitor to compute move times.
     Returns:
       - output_lines: list of formatted move lines (combined white/black per move number)
-      - moves_info: list of individual move dicts (each with side, move, time_used)
+      - sides: list of the chess.Color (True for White) that played each move
+      - sans: list of moves (SAN)
+      - times: list of time used per move (seconds)
       - initial_time: starting clock time (in seconds) per side.
     """
     try:
@@ -43,68 +125,45 @@ def process_game(game):
     except ValueError:
         initial_time = 1800.0
 
-    clock_pattern = re.compile(r"\[%clk\s+(\S+)\]")
-    board = game.board()
-    moves_info = []
+    moves = game.moves
+    sides = [side for side, _, _ in moves]
+    sans = [san_move for _, san_move, _ in moves]
+    # Moves without a clock keep a time of 0.0.
+    times = [0.0] * len(moves)
     white_prev = initial_time
     black_prev = initial_time
 
-    node = game
-    while node.variations:
-        next_node = node.variation(0)
-        comment = next_node.comment
-        match = clock_pattern.search(comment)
-        if match:
-            clock_time_str = match.group(1)
-            clock_seconds = parse_time_str(clock_time_str)
+    for i, (is_white, _, clock_seconds) in enumerate(moves):
+        if clock_seconds is None:
+            continue
+        if is_white:
+            times[i] = white_prev - clock_seconds
+            white_prev = clock_seconds
         else:
-            clock_seconds = None
-
-        side = "W" if board.turn == chess.WHITE else "B"
-        san_move = board.san(next_node.move)
-
-        if clock_seconds is not None:
-            if side == "W":
-                time_used = white_prev - clock_seconds
-                white_prev = clock_seconds
-            else:
-                time_used = black_prev - clock_seconds
-                black_prev = clock_seconds
-        else:
-            time_used = 0.0
-
-        moves_info.append({"side": side, "move": san_move, "time_used": time_used})
-
-        board.push(next_node.move)
-        node = next_node
-
-    # Build a combined move list with move numbers.
-    output_lines = []
-    move_number = 1
-    i = 0
-    while i < len(moves_info):
-        white_move = None
-        black_move = None
-        if i < len(moves_info) and moves_info[i]["side"] == "W":
-            white_move = moves_info[i]
-            i += 1
-        if i < len(moves_info) and moves_info[i]["side"] == "B":
-            black_move = moves_info[i]
-            i += 1
-        line = f"{move_number}. "
-        if white_move:
-            line += f"{white_move['move']} ({white_move['time_used']:.1f}s) "
-        if black_move:
-            line += f"{black_move['move']} ({black_move['time_used']:.1f}s)"
-        output_lines.append(line.strip())
-        move_number += 1
-
-    return output_lines, moves_info, initial_time
-
-
-def compute_stats(moves, initial_time):
+            times[i] = black_prev - clock_seconds
+            black_prev = clock_seconds
+
+    # Build a combined move list with move numbers. Sides strictly alternate,
+    # so after an optional lone black move (game set up with black to move)
+    # moves pair up as (white, black) by index.
+    move_count = len(sans)
+    first = 1 if move_count and not sides[0] else 0
+    output_lines = [None] * (first + (move_count - first + 1) // 2)
+    if first:
+        output_lines[0] = f"1. {sans[0]} ({times[0]:.1f}s)"
+    for k, i in enumerate(range(first, move_count, 2), start=first):
+        line = f"{k + 1}. {sans[i]} ({times[i]:.1f}s)"
+        if i + 1 < move_count:
+            line += f" {sans[i + 1]} ({times[i + 1]:.1f}s)"
+        output_lines[k] = line
+
+    return output_lines, sides, sans, times, initial_time
+
+
+def compute_stats(times, cumulative, initial_time):
     """
-    Compute overall statistics for a list of moves.
+    Compute overall statistics for a list of move times (seconds), given
+    its running totals (itertools.accumulate) as well.
     Returns a dict containing:
       - count: number of moves,
       - total_time: total time used,
@@ -116,7 +175,7 @@ def compute_stats(moves, initial_time):
 
     For a G/30 game (1800 seconds) and 40 moves, the recommended average move time is 45.0 seconds.
     """
-    if not moves:
+    if not times:
         return {
             "count": 0,
             "total_time": 0.0,
@@ -126,10 +185,10 @@ def compute_stats(moves, initial_time):
             "recommended_avg": 0.0,
             "efficiency_ratio": 0.0,
         }
-    count = len(moves)
-    total_time = sum(m["time_used"] for m in moves)
+    count = len(times)
+    total_time = cumulative[-1]
     avg_time = total_time / count
-    variance = sum((m["time_used"] - avg_time) ** 2 for m in moves) / count
+    variance = sum((t - avg_time) ** 2 for t in times) / count
     std_dev = math.sqrt(variance)
     consistency = (std_dev / avg_time * 100) if avg_time != 0 else 0.0
 
@@ -150,21 +209,22 @@ def compute_stats(moves, initial_time):
     }
 
 
-def analyze_segments(moves, recommended_avg=45.0):
+def analyze_segments(cumulative, recommended_avg=45.0):
     """
     Split moves into two segments and produce separate comments for the early and later game.
+    The segment averages are derived from the running totals of move times.
     Returns a tuple (early_comment, later_comment).
     """
-    if len(moves) < 2:
+    count = len(cumulative)
+    if count < 2:
         return (
             "Insufficient data for early game analysis.",
             "Insufficient data for later game analysis.",
         )
-    half = len(moves) // 2
-    first_half = moves[:half]
-    second_half = moves[half:]
-    avg_first = sum(m["time_used"] for m in first_half) / len(first_half)
-    avg_second = sum(m["time_used"] for m in second_half) / len(second_half)
+    half = count // 2
+    first_total = cumulative[half - 1]
+    avg_first = first_total / half
+    avg_second = (cumulative[-1] - first_total) / (count - half)
 
     # Early game analysis based on recommended average.
     early_comment = f"Early game average: {avg_first:.1f} s/move."
@@ -201,7 +261,9 @@ def efficiency_comment(eff_ratio):
         return "using time optimally"
 
 
-def detailed_move_stats_table(moves, overall_avg, recommended_avg, initial_time):
+def detailed_move_stats_table(
+    sans, times, cumulative, overall_avg, recommended_avg, initial_time
+):
     """
     Build a list of strings representing a detailed table of per-move statistics.
     For each move, the following stats are provided:
@@ -214,47 +276,38 @@ def detailed_move_stats_table(moves, overall_avg, recommended_avg, initial_time)
       - Delta(%): percentage deviation of the move's time from overall average
       - Remark: "fast" if >20% below recommended move time, "slow" if >20% above recommended move time, "optimal" otherwise.
     """
-
-    def format_mmss(seconds):
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
-        return f"{minutes:02d}:{secs:02d}"
-
-    lines = []
-    header = (
-        f"{'No.':>3}  {'Move':<8}  {'Time(s)':>7}  {'CumTime':>10}  "
-        f"{'Remain':>10}  {'AvgSoFar(s)':>12}  {'Delta(%)':>8}  {'Remark':>10}"
-    )
-    lines.append(header)
-    lines.append("-" * len(header))
-    cum = 0.0
-    for i, m in enumerate(moves, start=1):
-        cum += m["time_used"]
+    lines = [_DETAIL_HEADER, _DETAIL_SEP]
+    # Plain concatenation of preformatted cells is cheaper than one long
+    # f-string with a format spec per field.
+    for i, (san_move, t, cum) in enumerate(zip(sans, times, cumulative), start=1):
         avg_so_far = cum / i
         remain = initial_time - cum  # remaining time in seconds
-        delta = (
-            ((m["time_used"] - overall_avg) / overall_avg * 100)
-            if overall_avg != 0
-            else 0
-        )
+        delta = ((t - overall_avg) / overall_avg * 100) if overall_avg != 0 else 0
         rec_delta = (
-            ((m["time_used"] - recommended_avg) / recommended_avg * 100)
+            ((t - recommended_avg) / recommended_avg * 100)
             if recommended_avg != 0
             else 0
         )
         if rec_delta < -20:
-            remark = "fast"
+            remark_cell = _FAST_CELL
         elif rec_delta > 20:
-            remark = "slow"
+            remark_cell = _SLOW_CELL
         else:
-            remark = "optimal"
-        formatted_cum = format_mmss(cum)
-        formatted_remain = format_mmss(remain)
-        line = (
-            f"{i:>3}  {m['move']:<8}  {m['time_used']:>7.1f}  {formatted_cum:>10}  "
-            f"{formatted_remain:>10}  {avg_so_far:>12.1f}  {delta:>8.1f}%  {remark:>10}"
+            remark_cell = _OPTIMAL_CELL
+        lines.append(
+            "  ".join(
+                (
+                    str(i).rjust(3),
+                    san_move.ljust(8),
+                    format(t, "7.1f"),
+                    format_mmss(cum).rjust(10),
+                    format_mmss(remain).rjust(10),
+                    format(avg_so_far, "12.1f"),
+                    format(delta, "8.1f") + "%",
+                    remark_cell,
+                )
+            )
         )
-        lines.append(line)
     return lines
 
 
@@ -271,24 +324,43 @@ def main():
         required=True,
         help="Output text file for the game score and analysis",
     )
+    parser.add_argument(
+        "--headers-only",
+        action="store_true",
+        help=(
+            "Only write the game header block, skipping the movetext entirely "
+            "(the result then comes only from the Result tag)"
+        ),
+    )
     args = parser.parse_args()
 
-    with open(args.input, "r") as pgn_file:
-        game = chess.pgn.read_game(pgn_file)
-        if game is None:
+    # Only the first game is read, so a large text buffer is all the I/O needs;
+    # read_game works on a text stream and never touches the rest of the file.
+    with open(args.input, "r", encoding="utf-8", buffering=1 << 16) as pgn_file:
+        if args.headers_only:
+            headers = chess.pgn.read_headers(pgn_file)
+            if headers is not None:
+                # Match the seven-tag-roster defaults the full parse starts from.
+                defaults = chess.pgn.Headers()
+                defaults.update(headers)
+                headers = defaults
+        else:
+            game = chess.pgn.read_game(pgn_file, Visitor=ClockVisitor)
+            headers = game.headers if game is not None else None
+        if headers is None:
             print("No game found in the PGN file.")
             return
 
     # Build game header information with player names, game type, time control, and then result.
-    white = game.headers.get("White", "White")
-    black = game.headers.get("Black", "Black")
-    white_elo = game.headers.get("WhiteElo", "N/A")
-    black_elo = game.headers.get("BlackElo", "N/A")
-    result = game.headers.get("Result", "?")
-    event = game.headers.get("Event", "Unknown")
-    time_control = game.headers.get("TimeControl", "Unknown")
-    end_time = game.headers.get("EndTime", "Unknown")
-    ply_count = game.headers.get("PlyCount", "Unknown")
+    white = headers.get("White", "White")
+    black = headers.get("Black", "Black")
+    white_elo = headers.get("WhiteElo", "N/A")
+    black_elo = headers.get("BlackElo", "N/A")
+    result = headers.get("Result", "?")
+    event = headers.get("Event", "Unknown")
+    time_control = headers.get("TimeControl", "Unknown")
+    end_time = headers.get("EndTime", "Unknown")
+    ply_count = headers.get("PlyCount", "Unknown")
 
     game_header = (
         f"{white} ({white_elo}) vs {black} ({black_elo})\n"
@@ -297,21 +369,38 @@ def main():
         f"Result: {result}"
     )
 
+    if args.headers_only:
+        with open(args.output, "w") as out_file:
+            out_file.write(game_header + "\n")
+        print(f"Game header written to {args.output}")
+        return
+
     # Process game moves.
-    score_lines, moves_info, initial_time = process_game(game)
-    white_moves = [m for m in moves_info if m["side"] == "W"]
-    black_moves = [m for m in moves_info if m["side"] == "B"]
+    score_lines, sides, sans, times, initial_time = process_game(game)
+    white_sans = []
+    black_sans = []
+    white_times = []
+    black_times = []
+    for is_white, san_move, time_used in zip(sides, sans, times):
+        if is_white:
+            white_sans.append(san_move)
+            white_times.append(time_used)
+        else:
+            black_sans.append(san_move)
+            black_times.append(time_used)
+    white_cumulative = list(accumulate(white_times))
+    black_cumulative = list(accumulate(black_times))
 
     # Compute overall statistics.
-    stats_white = compute_stats(white_moves, initial_time)
-    stats_black = compute_stats(black_moves, initial_time)
+    stats_white = compute_stats(white_times, white_cumulative, initial_time)
+    stats_black = compute_stats(black_times, black_cumulative, initial_time)
 
     # Segment analysis (using 45s as recommended average for a G/30 game).
     early_seg_white, later_seg_white = analyze_segments(
-        white_moves, recommended_avg=45.0
+        white_cumulative, recommended_avg=45.0
     )
     early_seg_black, later_seg_black = analyze_segments(
-        black_moves, recommended_avg=45.0
+        black_cumulative, recommended_avg=45.0
     )
 
     # Clock efficiency comments.
@@ -389,36 +478,34 @@ def main():
 
     # Generate detailed move statistics tables using recommended average for remarks.
     white_detail_table = detailed_move_stats_table(
-        white_moves,
+        white_sans,
+        white_times,
+        white_cumulative,
         stats_white["avg_time"],
         stats_white["recommended_avg"],
         initial_time,
     )
     black_detail_table = detailed_move_stats_table(
-        black_moves,
+        black_sans,
+        black_times,
+        black_cumulative,
         stats_black["avg_time"],
         stats_black["recommended_avg"],
         initial_time,
     )
 
     # Write output.
-    with open(args.output, "w") as out_file:
-        out_file.write(game_header + "\n\n")
-        out_file.write("Game Moves:\n")
-        for line in score_lines:
-            out_file.write(line + "\n")
-        out_file.write("\n")
-        out_file.write("Detailed Move Statistics:\n\n")
-        out_file.write("White Moves:\n")
-        for line in white_detail_table:
-            out_file.write(line + "\n")
-        out_file.write("\n")
-        out_file.write("Black Moves:\n")
-        for line in black_detail_table:
-            out_file.write(line + "\n")
-        out_file.write("\n")
-        for line in analysis_lines:
-            out_file.write(line + "\n")
+    parts = [game_header, "", "Game Moves:"]
+    parts.extend(score_lines)
+    parts.extend(["", "Detailed Move Statistics:", "", "White Moves:"])
+    parts.extend(white_detail_table)
+    parts.extend(["", "Black Moves:"])
+    parts.extend(black_detail_table)
+    parts.append("")
+    parts.extend(analysis_lines)
+    parts.append("")
+    with open(args.output, "w", buffering=1 << 16) as out_file:
+        out_file.write("\n".join(parts))
 
     print(
         f"Game score, detailed move statistics, and analysis written to {args.output}"